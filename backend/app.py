@@ -1,122 +1,665 @@
 import os
 import configparser
-import uuid
+import hashlib
+import secrets
+import time
 import logging
 import traceback
 import re
-import json
+import shutil
 import urllib.parse
-from flask import Flask, request, jsonify, send_from_directory, send_file
+import threading
+import atexit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from flask import Flask, Response, abort, request, jsonify, send_from_directory
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
 import boto3
+import orjson
+from botocore.config import Config
+import werkzeug.utils
 from werkzeug.utils import secure_filename
 
+@dataclass(frozen=True)
+class Cfg:
+    """Settings from config/config.ini, parsed and converted once at startup"""
+    # AWS credentials
+    aws_access_key_id: str
+    aws_secret_access_key: str
+    region_name: str
+    # Polly configuration
+    output_format: str
+    voice_id_english: str
+    voice_id_chinese: str
+    # Number of Polly requests a single multipart text is synthesized with in parallel
+    max_workers: int
+    # HTTP connections kept to Polly; raise it when serving many requests at once (e.g. under gevent)
+    max_pool_connections: int
+    # Synthesize the preview of every voice in the background at startup
+    preview_prewarm: bool
+    # App configuration
+    upload_folder: str
+    output_folder: str
+    allowed_extensions: frozenset
+    max_text_length: int
+    # Longer texts are split into chunks of at most max_text_length and synthesized in parallel
+    max_input_length: int
+    # Most text files accepted by one upload request
+    max_upload_files: int
+    use_x_sendfile: bool
+    x_accel_redirect_prefix: str
+    log_level: str
+    # Flask configuration
+    host: str
+    port: int
+    debug: bool
+
+def load_cfg(path):
+    """Read the config file and build the settings"""
+    config = configparser.ConfigParser()
+    config.read(path)
+    return Cfg(
+        aws_access_key_id=config.get('AWS', 'aws_access_key_id').strip(),
+        aws_secret_access_key=config.get('AWS', 'aws_secret_access_key').strip(),
+        region_name=config.get('AWS', 'region_name').strip(),
+        output_format=config.get('POLLY', 'output_format').strip(),
+        voice_id_english=config.get('POLLY', 'voice_id_english').strip(),
+        voice_id_chinese=config.get('POLLY', 'voice_id_chinese').strip(),
+        max_workers=config.getint('POLLY', 'max_workers', fallback=16),
+        max_pool_connections=config.getint('POLLY', 'max_pool_connections', fallback=0),
+        preview_prewarm=config.getboolean('POLLY', 'preview_prewarm', fallback=False),
+        # Folders are resolved to absolute paths once so handlers don't redo it per request
+        upload_folder=os.path.abspath(config.get('APP', 'upload_folder')),
+        output_folder=os.path.abspath(config.get('APP', 'output_folder')),
+        # Entries may be written with or without the leading dot ("txt" or ".txt")
+        allowed_extensions=frozenset(e.strip().lower().lstrip('.') for e in config.get('APP', 'allowed_extensions').split(',') if e.strip()),
+        max_text_length=config.getint('APP', 'max_text_length'),
+        max_input_length=config.getint('APP', 'max_input_length', fallback=30000),
+        max_upload_files=config.getint('APP', 'max_upload_files', fallback=20),
+        use_x_sendfile=config.getboolean('APP', 'use_x_sendfile', fallback=False),
+        x_accel_redirect_prefix=config.get('APP', 'x_accel_redirect_prefix', fallback='').strip(),
+        log_level=config.get('APP', 'log_level', fallback='INFO').strip().upper(),
+        host=config.get('FLASK', 'host').strip(),
+        port=config.getint('FLASK', 'port'),
+        debug=config.getboolean('FLASK', 'debug')
+    )
+
+# Read configuration
+CFG = load_cfg(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.ini'))
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, so jsonify and request.get_json skip the stdlib encoder"""
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype='application/json')
+
+app = Flask(__name__, static_folder='../frontend/build')
+app.json = OrjsonProvider(app)
+# Reject oversized uploads before Werkzeug spools them: a UTF-8 character is at most
+# 4 bytes, plus some room for the multipart headers and form fields
+app.config['MAX_CONTENT_LENGTH'] = CFG.max_input_length * 4 * CFG.max_upload_files + 64 * 1024
+CORS(app)  # Enable CORS for all routes
+
 # Set up logging
 logging.basicConfig(
-    level=logging.DEBUG,
+    # LOGLEVEL in the environment overrides log_level from the config file
+    level=os.environ.get('LOGLEVEL', CFG.log_level).upper(),
     format='%(asctime)s [%(levelname)s] %(message)s',
     handlers=[logging.StreamHandler()]
 )
 logger = logging.getLogger(__name__)
 
-# Read configuration
-config = configparser.ConfigParser()
-config.read(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.ini'))
-
-app = Flask(__name__, static_folder='../frontend/build')
-CORS(app)  # Enable CORS for all routes
-
-# Configure AWS credentials from config file
-aws_access_key_id = config.get('AWS', 'aws_access_key_id').strip()
-aws_secret_access_key = config.get('AWS', 'aws_secret_access_key').strip()
-region_name = config.get('AWS', 'region_name').strip()
+# Let the reverse proxy send audio files (X-Sendfile, or X-Accel-Redirect for nginx)
+# instead of streaming them through the Python process. Only the audio endpoints
+# offload; the React build is always sent by Flask itself.
+audio_offload = CFG.use_x_sendfile or bool(CFG.x_accel_redirect_prefix)
 
 # Log credential information (don't include secrets in production)
-logger.debug(f"AWS Region: {region_name}")
-logger.debug(f"Access Key ID length: {len(aws_access_key_id)}")
-
-# Polly configuration
-output_format = config.get('POLLY', 'output_format')
-voice_id_english = config.get('POLLY', 'voice_id_english')
-voice_id_chinese = config.get('POLLY', 'voice_id_chinese')
-
-# App configuration
-upload_folder = config.get('APP', 'upload_folder')
-output_folder = config.get('APP', 'output_folder')
-allowed_extensions = config.get('APP', 'allowed_extensions').split(',')
-max_text_length = int(config.get('APP', 'max_text_length'))
+logger.debug("AWS Region: %s", CFG.region_name)
+logger.debug("Access Key ID length: %d", len(CFG.aws_access_key_id))
 
 # File mapping database (mapping between stored files and download filenames)
 file_mapping_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'file_mapping.json')
 
 # Create directories if they don't exist
-os.makedirs(upload_folder, exist_ok=True)
-os.makedirs(output_folder, exist_ok=True)
+os.makedirs(CFG.upload_folder, exist_ok=True)
+os.makedirs(CFG.output_folder, exist_ok=True)
 
 # Initialize file mapping if it doesn't exist
 if not os.path.exists(file_mapping_path):
-    with open(file_mapping_path, 'w') as f:
-        json.dump({}, f)
+    with open(file_mapping_path, 'wb') as f:
+        f.write(b'{}')
 
-def get_file_mapping():
+def load_file_mapping():
     """Read the file mapping from disk"""
     try:
-        with open(file_mapping_path, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
+        with open(file_mapping_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (FileNotFoundError, orjson.JSONDecodeError):
         return {}
 
+def temp_path_for(path):
+    """Return a unique temporary path next to path, for writing a file before os.replace puts it in place"""
+    # Concurrent writers of the same file each get their own temp file
+    return f"{path}.{secrets.token_hex(8)}.tmp"
+
+def write_file_atomically(path, data):
+    """Write data to a temporary file and swap it in, so readers never see a partial file"""
+    tmp_path = temp_path_for(path)
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
 def save_file_mapping(mapping):
     """Save the file mapping to disk"""
-    with open(file_mapping_path, 'w') as f:
-        json.dump(mapping, f)
+    # Encode once and write in a single call, then swap the file in atomically
+    # so a crash mid-write can't leave a truncated mapping behind
+    write_file_atomically(file_mapping_path, orjson.dumps(mapping))
+
+# The file mapping is kept in memory and written back to disk shortly after it changes
+_MAPPING = load_file_mapping()
+
+def _mapping_base(stored_filename):
+    """Strip the extension from a stored filename for basename lookups"""
+    return stored_filename.split('.')[0] if '.' in stored_filename else stored_filename
+
+# Reverse index from stored basename (without extension) to (stored, display) filenames
+_MAPPING_BY_BASE = {}
+for _stored, _display in _MAPPING.items():
+    _MAPPING_BY_BASE.setdefault(_mapping_base(_stored), (_stored, _display))
+
+_MAPPING_LOCK = threading.Lock()
+_MAPPING_FLUSH_LOCK = threading.Lock()
+_mapping_dirty = False
+_mapping_flush_timer = None
+mapping_flush_delay = 1.0
+
+def get_file_mapping():
+    """Return the in-memory file mapping"""
+    return _MAPPING
+
+def find_file_mapping(base_filename):
+    """Look up the (stored, display) filenames for a stored basename"""
+    return _MAPPING_BY_BASE.get(base_filename, (None, None))
+
+def flush_file_mapping():
+    """Write the in-memory file mapping to disk if it has pending changes"""
+    global _mapping_dirty, _mapping_flush_timer
+    with _MAPPING_FLUSH_LOCK:
+        with _MAPPING_LOCK:
+            _mapping_flush_timer = None
+            if not _mapping_dirty:
+                return
+            snapshot = dict(_MAPPING)
+            _mapping_dirty = False
+        save_file_mapping(snapshot)
+
+def add_file_mappings(entries):
+    """Add several entries to the file mapping and schedule a single flush to disk"""
+    global _mapping_dirty, _mapping_flush_timer
+    if not entries:
+        return
+    with _MAPPING_LOCK:
+        _MAPPING.update(entries)
+        for stored_filename, display_filename in entries.items():
+            base = _mapping_base(stored_filename)
+            if _MAPPING_BY_BASE.get(base, (stored_filename,))[0] == stored_filename:
+                _MAPPING_BY_BASE[base] = (stored_filename, display_filename)
+        _mapping_dirty = True
+        # A single pending flush picks up every change made before it fires
+        if _mapping_flush_timer is None:
+            _mapping_flush_timer = threading.Timer(mapping_flush_delay, flush_file_mapping)
+            _mapping_flush_timer.daemon = True
+            _mapping_flush_timer.start()
 
 def add_file_mapping(stored_filename, display_filename):
-    """Add a new entry to the file mapping"""
-    mapping = get_file_mapping()
-    mapping[stored_filename] = display_filename
-    save_file_mapping(mapping)
+    """Add a new entry to the file mapping and schedule a flush to disk"""
+    add_file_mappings({stored_filename: display_filename})
+
+# Don't lose pending mapping changes on shutdown
+atexit.register(flush_file_mapping)
 
 # Initialize Polly client with better error handling
 try:
     # Initialize Polly client
     session = boto3.Session(
-        aws_access_key_id=aws_access_key_id,
-        aws_secret_access_key=aws_secret_access_key,
-        region_name=region_name
+        aws_access_key_id=CFG.aws_access_key_id,
+        aws_secret_access_key=CFG.aws_secret_access_key,
+        region_name=CFG.region_name
     )
-    polly_client = session.client('polly')
+    # Size the connection pool for the worker threads plus the request threads
+    # so concurrent calls reuse warm connections instead of queueing for one
+    polly_client = session.client('polly', config=Config(
+        max_pool_connections=CFG.max_pool_connections or CFG.max_workers * 2,
+        # Fail fast on unreachable endpoints, but leave long syntheses time to stream
+        connect_timeout=2,
+        read_timeout=30,
+        retries={'max_attempts': 2, 'mode': 'standard'},
+        tcp_keepalive=True
+    ))
     logger.info("AWS Polly client initialized successfully")
 except Exception as e:
-    logger.error(f"Error initializing AWS Polly client: {str(e)}")
-    logger.error(traceback.format_exc())
+    logger.error("Error initializing AWS Polly client: %s\n%s", e, traceback.format_exc())
     # Continue execution - we'll handle errors in the endpoints
 
+# Chunk size used when streaming Polly audio to disk
+audio_chunk_size = 64 * 1024
+
+# Thread pool used to synthesize the parts of a multipart text concurrently
+executor = ThreadPoolExecutor(max_workers=CFG.max_workers)
+
+# Audio bodies are written to disk in the background so requests can return as soon
+# as Polly answers; the audio endpoints wait for a pending write before serving it.
+# The writer pool matches the synthesis pool so parallel parts keep streaming in parallel.
+_writer_pool = ThreadPoolExecutor(max_workers=CFG.max_workers)
+_writer_slots = threading.BoundedSemaphore(CFG.max_workers * 4)
+_pending_writes = {}
+_pending_writes_lock = threading.Lock()
+
+def _persist(audio_stream, output_path, internal_filename):
+    """Stream a Polly audio body to output_path"""
+    # Write to a temporary file first so a partial download is never mistaken
+    # for a cached audio file
+    tmp_path = temp_path_for(output_path)
+    try:
+        with open(tmp_path, 'wb') as audio_file:
+            shutil.copyfileobj(audio_stream, audio_file, audio_chunk_size)
+        os.replace(tmp_path, output_path)
+    except Exception as e:
+        logger.error("Error saving audio file %s: %s", internal_filename, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    finally:
+        audio_stream.close()
+        with _pending_writes_lock:
+            _pending_writes.pop(internal_filename, None)
+        _writer_slots.release()
+
+def persist_audio(response, output_path):
+    """Queue the audio of a Polly response to be saved to output_path"""
+    if "AudioStream" not in response:
+        return
+    internal_filename = os.path.basename(output_path)
+    # Block when too many writes are queued so slow disks push back on requests
+    _writer_slots.acquire()
+    with _pending_writes_lock:
+        if internal_filename in _pending_writes:
+            # An identical request is already saving this audio
+            response['AudioStream'].close()
+            _writer_slots.release()
+            return
+        try:
+            _pending_writes[internal_filename] = _writer_pool.submit(
+                _persist, response['AudioStream'], output_path, internal_filename
+            )
+        except Exception:
+            # Give the connection back to the pool if the write can't be queued
+            response['AudioStream'].close()
+            _writer_slots.release()
+            raise
+
+def audio_filename_for(text, voice_id, language_code):
+    """Name an audio file after everything that determines its content"""
+    key = hashlib.sha256(f"{voice_id}|{language_code}|{CFG.output_format}|{text}".encode('utf-8')).hexdigest()
+    return f"{key}.{CFG.output_format}"
+
+def download_url_for(internal_filename, display_filename):
+    """Download URL of an audio file that carries the display name chosen by this request"""
+    # Identical texts share one audio file, so the name travels with the URL instead of the file
+    return f"/api/download/{internal_filename}?name={urllib.parse.quote(display_filename)}"
+
+def audio_cached(internal_filename):
+    """Check whether an audio file already exists or is being saved"""
+    return internal_filename in _pending_writes or os.path.exists(os.path.join(CFG.output_folder, internal_filename))
+
+def wait_for_audio(stored_filename):
+    """Wait for a pending background write of stored_filename to finish"""
+    future = _pending_writes.get(stored_filename)
+    if future is not None:
+        try:
+            future.result()
+        except Exception:
+            # Already logged by _persist; the missing file is reported by the caller
+            pass
+
+# Cached result of describe_voices, the voice list rarely changes.
+# The /api/voices response body is encoded once per refresh and served as-is on hits.
+# A failed lookup is cached too (with 'error' set and ids None) for a shorter time,
+# so a denied or unreachable DescribeVoices doesn't cost every request a round trip.
+voices_cache_ttl = 3600
+voices_error_ttl = 60
+_voices_cache = {'data': None, 'body': None, 'ids': None, 'error': None, 'expires': 0}
+_voices_cache_lock = threading.Lock()
+
+def _voices_entry():
+    """Return the current voices cache entry, calling describe_voices only when it has expired"""
+    global _voices_cache
+    entry = _voices_cache
+    if time.monotonic() < entry['expires']:
+        return entry
+    # Only one request refreshes the cache, the others wait for its result
+    with _voices_cache_lock:
+        entry = _voices_cache
+        if time.monotonic() < entry['expires']:
+            return entry
+        logger.info("Fetching voices from Amazon Polly")
+        try:
+            response = polly_client.describe_voices()
+        except Exception as e:
+            logger.error("Error fetching voices from Amazon Polly: %s", e)
+            _voices_cache = {
+                'data': None,
+                'body': None,
+                'ids': None,
+                'error': str(e),
+                'expires': time.monotonic() + voices_error_ttl
+            }
+            return _voices_cache
+        voices = [
+            {
+                'id': voice['Id'],
+                'name': voice['Name'],
+                'language': voice['LanguageCode'],
+                'gender': voice['Gender']
+            }
+            for voice in response['Voices']
+        ]
+        # Swap in a whole new entry so readers never see the list and body out of step
+        _voices_cache = {
+            'data': voices,
+            'body': orjson.dumps({'voices': voices}),
+            'ids': frozenset(voice['id'] for voice in voices),
+            'error': None,
+            'expires': time.monotonic() + voices_cache_ttl
+        }
+        logger.info("Successfully retrieved %s voices", len(voices))
+        return _voices_cache
+
+def _voices_ok():
+    """Return the voices cache entry, raising if the last describe_voices call failed"""
+    entry = _voices_entry()
+    if entry['error'] is not None:
+        raise RuntimeError(entry['error'])
+    return entry
+
+def get_cached_voices():
+    """Return the list of Polly voices"""
+    return _voices_ok()['data']
+
+def get_cached_voices_body():
+    """Return the encoded /api/voices response body"""
+    return _voices_ok()['body']
+
+def is_known_voice(voice_id):
+    """Check a voice id against the cached voice list before spending a Polly call on it"""
+    if not isinstance(voice_id, str):
+        return False
+    ids = _voices_entry()['ids']
+    # Without a voice list let Polly be the judge rather than rejecting every request
+    return ids is None or voice_id in ids
+
+def invalidate_voices_cache():
+    """Make the next voices lookup call describe_voices again"""
+    global _voices_cache
+    with _voices_cache_lock:
+        _voices_cache = dict(_voices_cache, expires=0)
+
+# Background jobs for requests made with ?async=1, polled through /api/jobs/<job_id>.
+# Jobs get their own pool since they fan out their parts to the synthesis executor.
+# The job store lives in memory, which works because the backend runs as one process.
+job_ttl = 3600
+_job_pool = ThreadPoolExecutor(max_workers=4)
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+def _run_job(job, func, args):
+    """Run a queued job and store its result"""
+    job['state'] = 'running'
+    try:
+        job['result'], job['status'] = func(*args)
+        job['state'] = 'done'
+    except Exception as e:
+        logger.error("Error running job: %s\n%s", e, traceback.format_exc())
+        job['result'], job['status'] = {'error': str(e)}, 500
+        job['state'] = 'failed'
+
+def submit_job(func, *args):
+    """Queue func(*args), which returns (payload, status), and respond with the job id"""
+    now = time.monotonic()
+    job_id = secrets.token_hex(12)
+    job = {'state': 'pending', 'result': None, 'status': None, 'expires': now + job_ttl}
+    with _jobs_lock:
+        # Forget jobs that are past their time to live
+        for expired_id in [jid for jid, old_job in _jobs.items() if old_job['expires'] < now]:
+            del _jobs[expired_id]
+        _jobs[job_id] = job
+    _job_pool.submit(_run_job, job, func, args)
+    return jsonify({'jobId': job_id, 'statusUrl': f'/api/jobs/{job_id}'}), 202
+
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
+    return os.path.splitext(filename)[1][1:].lower() in CFG.allowed_extensions
+
+def read_upload(file, file_path=None):
+    """Read an uploaded text file once, keeping a copy of it in the upload folder if file_path is given"""
+    # A UTF-8 character is at most 4 bytes, so anything larger can't fit max_input_length
+    max_bytes = CFG.max_input_length * 4
+    data = file.stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f'File exceeds maximum size of {max_bytes} bytes')
+    text = data.decode('utf-8', errors='replace')
+    if len(text) > CFG.max_input_length:
+        raise ValueError(f'Text exceeds maximum length of {CFG.max_input_length} characters')
+    if file_path:
+        with open(file_path, 'wb') as upload:
+            upload.write(data)
+    return text
+
+# Chunks are kept well below Polly's per-request limit
+long_text_chunk_size = 1500
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?])\s+|(?<=[。！？])')
+
+def _split_sentences(text):
+    """Yield (sentence, separator) pairs, where separator is the text that followed the sentence"""
+    pos = 0
+    for match in _SENTENCE_END_RE.finditer(text):
+        yield text[pos:match.start()], match.group()
+        pos = match.end()
+    yield text[pos:], ''
+
+def _chunk_text(text, size=long_text_chunk_size):
+    """Split text into chunks of at most size characters, on sentence boundaries where possible"""
+    # Never go over the configured limit, even where it is set below the chunk size
+    size = min(size, CFG.max_text_length)
+    chunks = []
+    current = ''
+    separator = ''
+    for sentence, next_separator in _split_sentences(text):
+        # Hard-split sentences that are too long on their own
+        while len(sentence) > size:
+            cut = sentence.rfind(' ', 0, size)
+            cut = cut if cut > 0 else size
+            if current:
+                chunks.append(current)
+                current = ''
+            chunks.append(sentence[:cut])
+            sentence = sentence[cut:].lstrip()
+        if current and len(current) + len(separator) + len(sentence) > size:
+            chunks.append(current)
+            current = ''
+        # Rejoin with the original separator; CJK sentences are split without one
+        current = f"{current}{separator}{sentence}" if current else sentence
+        separator = next_separator
+    if current.strip():
+        chunks.append(current)
+    return chunks
+
+def _synthesize_long_text(text, voice_id, language_code, output_path):
+    """Synthesize text longer than Polly accepts by splitting it and joining the audio"""
+    def synth_chunk(chunk):
+        response = polly_client.synthesize_speech(
+            Text=chunk,
+            VoiceId=voice_id,
+            LanguageCode=language_code,
+            OutputFormat=CFG.output_format
+        )
+        try:
+            return response['AudioStream'].read()
+        finally:
+            response['AudioStream'].close()
+    
+    # Synthesize the chunks concurrently; MP3 frames can simply be concatenated
+    audio = list(executor.map(synth_chunk, _chunk_text(text)))
+    tmp_path = temp_path_for(output_path)
+    try:
+        with open(tmp_path, 'wb') as audio_file:
+            audio_file.writelines(audio)
+        os.replace(tmp_path, output_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def synthesize_to_file(text, voice_id, language_code, output_path):
+    """Synthesize text with Amazon Polly and save it to output_path, unless it already exists"""
+    if audio_cached(os.path.basename(output_path)):
+        return
+    
+    if len(text) > CFG.max_text_length:
+        _synthesize_long_text(text, voice_id, language_code, output_path)
+        return
+    
+    response = polly_client.synthesize_speech(
+        Text=text,
+        VoiceId=voice_id,
+        LanguageCode=language_code,
+        OutputFormat=CFG.output_format
+    )
+    
+    # Save the audio to a file in the background
+    persist_audio(response, output_path)
+
+def _synth_one(part, voice_id, language_code, output_path):
+    """Synthesize a single text part with Amazon Polly and save it to output_path"""
+    # Parts already run on the executor, so they can't fan out into chunks on it as well
+    if len(part['text']) > CFG.max_text_length:
+        raise ValueError(f"Text exceeds maximum length of {CFG.max_text_length} characters")
+    synthesize_to_file(part['text'], voice_id, language_code, output_path)
+
+# Short phrase used to preview voices, saved once per voice
+PREVIEW_TEXT = "The quick brown fox jumps over the lazy dog."
+# Lock file that lets only one process prewarm at a time (e.g. the debug reloader's
+# parent and child); a lock older than preview_prewarm_stale is left over from a crash
+preview_prewarm_lock_path = os.path.join(CFG.output_folder, '.preview_prewarm.lock')
+preview_prewarm_stale = 600
+
+def preview_filename(voice_id):
+    """Stable filename of the preview audio for a voice"""
+    return f"preview_{voice_id}.{CFG.output_format}"
+
+def synthesize_preview(voice):
+    """Make sure the preview audio of a voice exists and return its filename"""
+    filename = preview_filename(voice['id'])
+    synthesize_to_file(PREVIEW_TEXT, voice['id'], voice['language'], os.path.join(CFG.output_folder, filename))
+    wait_for_audio(filename)
+    return filename
+
+def _acquire_prewarm_lock():
+    """Create the prewarm lock file, returning False if another process holds it"""
+    try:
+        os.close(os.open(preview_prewarm_lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        pass
+    try:
+        if time.time() - os.path.getmtime(preview_prewarm_lock_path) < preview_prewarm_stale:
+            return False
+        os.remove(preview_prewarm_lock_path)
+    except FileNotFoundError:
+        pass
+    # Take over a stale lock, unless another process got there first
+    try:
+        os.close(os.open(preview_prewarm_lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        return True
+    except FileExistsError:
+        return False
+
+def prewarm_previews():
+    """Synthesize the missing previews of all voices"""
+    # Only one prewarm runs at a time across all processes
+    if not _acquire_prewarm_lock():
+        logger.info("Voice previews are already being prewarmed by another process")
+        return
+    try:
+        for voice in get_cached_voices():
+            try:
+                synthesize_preview(voice)
+            except Exception as e:
+                logger.warning("Could not synthesize preview for voice %s: %s", voice['id'], e)
+    except Exception as e:
+        logger.error("Error prewarming voice previews: %s", e)
+    finally:
+        try:
+            os.remove(preview_prewarm_lock_path)
+        except FileNotFoundError:
+            pass
+
+if CFG.preview_prewarm:
+    threading.Thread(target=prewarm_previews, name='preview-prewarm', daemon=True).start()
+
+# Separator line ("---------- name") and characters not allowed in display filenames
+_SEPARATOR_RE = re.compile(r'^----------\s*(.*?)$')
+_CLEAN_NAME_RE = re.compile(r'[^a-zA-Z0-9_-]')
+_SEPARATOR_LINE_RE = re.compile(r'^[^\S\r\n]*----------', re.MULTILINE)
+
+def find_separator(text):
+    """Return the offset of the first separator line in text, or -1 if there is none"""
+    match = _SEPARATOR_LINE_RE.search(text)
+    return match.start() if match else -1
 
 # Function to split text by separator and extract file names
-def split_text_by_separator(text):
+def split_text_by_separator(text, first_sep_offset=0):
     parts = []
-    current_text = ""
+    current_lines = []
     current_name = None
     
-    # Split the text by newlines to process line by line
-    lines = text.split('\n')
+    # Text before the first separator (already located by find_separator) is the intro
+    intro = text[:first_sep_offset]
+    if intro.strip():
+        current_name = "intro"
+        current_lines = [intro]
+    
+    # Split the rest of the text by newlines to process line by line
+    lines = text[first_sep_offset:].splitlines()
     
     for line in lines:
+        stripped = line.strip()
+        
         # Check if this is a separator line
-        if line.strip().startswith('----------'):
+        if stripped.startswith('----------'):
             # If we've already been collecting text, save it as a part
-            if current_name is not None and current_text:
+            if current_name is not None and current_lines:
                 parts.append({
-                    'text': current_text.strip(),
+                    'text': '\n'.join(current_lines).strip(),
                     'name': current_name
                 })
-                current_text = ""
+                current_lines = []
             
             # Extract name from the separator line
-            separator_match = re.match(r'^----------\s*(.*?)$', line.strip())
+            separator_match = _SEPARATOR_RE.match(stripped)
             if separator_match:
                 name_part = separator_match.group(1).strip()
                 current_name = name_part if name_part else f"part_{len(parts) + 1}"
@@ -125,16 +668,16 @@ def split_text_by_separator(text):
         else:
             # If we've encountered a separator, add to current text
             if current_name is not None:
-                current_text += line + "\n"
+                current_lines.append(line)
             # If text appears before any separator, create a default part
-            elif line.strip():
+            elif stripped:
                 current_name = "intro"
-                current_text = line + "\n"
+                current_lines = [line]
     
     # Don't forget to add the last part
-    if current_name is not None and current_text:
+    if current_name is not None and current_lines:
         parts.append({
-            'text': current_text.strip(),
+            'text': '\n'.join(current_lines).strip(),
             'name': current_name
         })
     
@@ -151,27 +694,128 @@ def split_text_by_separator(text):
 def get_voices(): 
     """Get list of available voices from Amazon Polly"""
     try:
-        logger.info("Fetching voices from Amazon Polly")
-        response = polly_client.describe_voices()
-        voices = [
-            {
-                'id': voice['Id'],
-                'name': voice['Name'],
-                'language': voice['LanguageCode'],
-                'gender': voice['Gender']
-            }
-            for voice in response['Voices']
-        ]
-        logger.info(f"Successfully retrieved {len(voices)} voices")
-        return jsonify({'voices': voices})
+        # ?refresh=1 forces a fresh describe_voices call; only honoured while debugging
+        # so anonymous clients can't bypass the cache
+        if request.args.get('refresh') and app.debug:
+            invalidate_voices_cache()
+        return Response(get_cached_voices_body(), mimetype='application/json')
     except Exception as e:
-        logger.error(f"Error retrieving voices: {str(e)}")
-        logger.error(traceback.format_exc())
-        return jsonify({
+        tb = traceback.format_exc()
+        logger.error("Error retrieving voices: %s\n%s", e, tb)
+        body = {
             'error': str(e),
-            'message': 'Failed to retrieve voices. Check AWS credentials.',
-            'traceback': traceback.format_exc()
-        }), 500
+            'message': 'Failed to retrieve voices. Check AWS credentials.'
+        }
+        # Only expose server internals while debugging
+        if app.debug:
+            body['traceback'] = tb
+        return jsonify(body), 500
+
+def _synthesize_text(text, voice_id, language_code):
+    """Synthesize text, split into parts if it has separators; returns (payload, status)"""
+    # Check if the text has separators
+    sep_offset = find_separator(text)
+    if sep_offset != -1:
+        text_parts = split_text_by_separator(text, sep_offset)
+        logger.info("Splitting text into %s parts", len(text_parts))
+        logger.debug("Text parts: %s", text_parts)
+        errors = []
+        
+        jobs = []
+        for part in text_parts:
+            if len(part['text']) > CFG.max_text_length:
+                errors.append({
+                    'name': part['name'],
+                    'error': f"Text exceeds maximum length of {CFG.max_text_length} characters"
+                })
+                continue
+            
+            # Name the audio after its content so repeated requests reuse it
+            internal_filename = audio_filename_for(part['text'], voice_id, language_code)
+            output_path = os.path.join(CFG.output_folder, internal_filename)
+            
+            # Generate a clean display filename for download
+            clean_name = _CLEAN_NAME_RE.sub('_', part['name'])
+            display_filename = f"{clean_name}.{CFG.output_format}"
+            
+            jobs.append((part, internal_filename, display_filename, output_path))
+        
+        # Call Amazon Polly for all parts concurrently
+        futures = {
+            executor.submit(_synth_one, part, voice_id, language_code, output_path): (index, part, internal_filename, display_filename)
+            for index, (part, internal_filename, display_filename, output_path) in enumerate(jobs)
+        }
+        completed = {}
+        new_entries = {}
+        for future in as_completed(futures):
+            index, part, internal_filename, display_filename = futures[future]
+            try:
+                future.result()
+                new_entries[internal_filename] = display_filename
+                
+                completed[index] = {
+                    'name': part['name'],
+                    'filename': display_filename,
+                    'url': f'/api/audio/{internal_filename}',
+                    'downloadUrl': download_url_for(internal_filename, display_filename)
+                }
+            except Exception as e:
+                logger.error("Error synthesizing part %s: %s", part['name'], e)
+                errors.append({
+                    'name': part['name'],
+                    'error': str(e)
+                })
+        
+        # Save mapping between internal and display filenames for all parts at once
+        add_file_mappings(new_entries)
+        
+        # Keep results in the same order as the parts in the text
+        results = [completed[index] for index in sorted(completed)]
+        
+        return {
+            'success': True,
+            'results': results,
+            'errors': errors,
+            'multipart': True
+        }, 200
+    else:
+        # Original single text processing
+        if len(text) > CFG.max_input_length:
+            return {'error': f'Text exceeds maximum length of {CFG.max_input_length} characters'}, 400
+        
+        # Name the audio after its content so repeated requests reuse it
+        internal_filename = audio_filename_for(text, voice_id, language_code)
+        output_path = os.path.join(CFG.output_folder, internal_filename)
+        
+        # Generate a clean display filename for download
+        display_filename = f"audio.{CFG.output_format}"
+        
+        # Call Amazon Polly to synthesize speech, unless this audio exists already
+        synthesize_to_file(text, voice_id, language_code, output_path)
+        
+        # Save mapping between internal and display filenames
+        add_file_mapping(internal_filename, display_filename)
+        
+        return {
+            'success': True,
+            'filename': display_filename,
+            'url': f'/api/audio/{internal_filename}',
+            'downloadUrl': download_url_for(internal_filename, display_filename)
+        }, 200
+
+@app.route('/api/preview/<voice_id>', methods=['GET'])
+def get_preview(voice_id):
+    """Serve a short preview of a voice, synthesizing it on first use"""
+    try:
+        voice = next((v for v in get_cached_voices() if v['id'] == voice_id), None)
+        if voice is None:
+            return jsonify({'error': 'Unknown voice'}), 404
+        
+        filename = synthesize_preview(voice)
+        return send_audio(filename)
+    except Exception as e:
+        logger.error("Error serving preview for voice %s: %s\n%s", voice_id, e, traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/synthesize', methods=['POST'])
 def synthesize_speech():
@@ -184,121 +828,131 @@ def synthesize_speech():
             return jsonify({'error': 'No text provided'}), 400
             
         text = data['text']
-        voice_id = data.get('voiceId', voice_id_english)
+        voice_id = data.get('voiceId', CFG.voice_id_english)
         language_code = data.get('languageCode', 'en-US')
+        if not is_known_voice(voice_id):
+            return jsonify({'error': f'Unknown voice: {voice_id}'}), 400
         
-        # Check if the text has separators
-        if '----------' in text: 
-            text_parts = split_text_by_separator(text)
-            logger.info(f"Splitting text into {len(text_parts)} parts")
-            logger.debug(f"Text parts: {text_parts}")
-            results = []
-            errors = []
-            
-            for part in text_parts:
-                try:
-                    if len(part['text']) > max_text_length:
-                        errors.append({
-                            'name': part['name'],
-                            'error': f"Text exceeds maximum length of {max_text_length} characters"
-                        })
-                        continue
-                    
-                    # Generate a unique internal filename
-                    unique_id = str(uuid.uuid4())
-                    internal_filename = f"{unique_id}.{output_format}"
-                    output_path = os.path.join(output_folder, internal_filename)
-                    
-                    # Generate a clean display filename for download
-                    clean_name = re.sub(r'[^a-zA-Z0-9_-]', '_', part['name'])
-                    display_filename = f"{clean_name}.{output_format}"
-                    
-                    # Call Amazon Polly to synthesize speech
-                    polly_response = polly_client.synthesize_speech(
-                        Text=part['text'],
-                        VoiceId=voice_id,
-                        LanguageCode=language_code,
-                        OutputFormat=output_format
-                    )
-                    
-                    # Save the audio to a file
-                    if "AudioStream" in polly_response:
-                        with open(output_path, 'wb') as file:
-                            file.write(polly_response['AudioStream'].read())
-                    
-                    # Save mapping between internal and display filenames
-                    add_file_mapping(internal_filename, display_filename)
-                    
-                    results.append({
-                        'name': part['name'],
-                        'filename': display_filename,
-                        'url': f'/api/audio/{internal_filename}',
-                        'downloadUrl': f'/api/download/{internal_filename}'
-                    })
-                except Exception as e:
-                    logger.error(f"Error synthesizing part {part['name']}: {str(e)}")
-                    errors.append({
-                        'name': part['name'],
-                        'error': str(e)
-                    })
-            
-            return jsonify({
-                'success': True,
-                'results': results,
-                'errors': errors,
-                'multipart': True
-            })
-        else:
-            # Original single text processing
-            if len(text) > max_text_length:
-                return jsonify({'error': f'Text exceeds maximum length of {max_text_length} characters'}), 400
-            
-            # Generate a unique internal filename
-            unique_id = str(uuid.uuid4())
-            internal_filename = f"{unique_id}.{output_format}"
-            output_path = os.path.join(output_folder, internal_filename)
-            
-            # Generate a clean display filename for download
-            display_filename = f"audio.{output_format}"
-            
-            # Call Amazon Polly to synthesize speech
-            response = polly_client.synthesize_speech(
-                Text=text,
-                VoiceId=voice_id,
-                LanguageCode=language_code,
-                OutputFormat=output_format
-            )
-            
-            # Save the audio to a file
-            if "AudioStream" in response:
-                with open(output_path, 'wb') as file:
-                    file.write(response['AudioStream'].read())
-            
-            # Save mapping between internal and display filenames
-            add_file_mapping(internal_filename, display_filename)
-                    
-            return jsonify({
-                'success': True,
-                'filename': display_filename,
-                'url': f'/api/audio/{internal_filename}',
-                'downloadUrl': f'/api/download/{internal_filename}'
-            })
+        # ?async=1 queues the work and returns a job id to poll instead
+        if request.args.get('async'):
+            return submit_job(_synthesize_text, text, voice_id, language_code)
+        
+        payload, status = _synthesize_text(text, voice_id, language_code)
+        return jsonify(payload), status
+        
+    except Exception as e:
+        logger.error("Error synthesizing speech: %s\n%s", e, traceback.format_exc())
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/synthesize_stream', methods=['POST'])
+def synthesize_speech_stream():
+    """Convert text to speech and stream the audio back while Polly is still producing it"""
+    try:
+        data = request.get_json()
+        
+        if not data or 'text' not in data:
+            return jsonify({'error': 'No text provided'}), 400
+        
+        text = data['text']
+        voice_id = data.get('voiceId', CFG.voice_id_english)
+        language_code = data.get('languageCode', 'en-US')
+        if not is_known_voice(voice_id):
+            return jsonify({'error': f'Unknown voice: {voice_id}'}), 400
+        
+        if len(text) > CFG.max_text_length:
+            return jsonify({'error': f'Text exceeds maximum length of {CFG.max_text_length} characters'}), 400
         
+        internal_filename = audio_filename_for(text, voice_id, language_code)
+        output_path = os.path.join(CFG.output_folder, internal_filename)
+        headers = {'X-Download-Url': download_url_for(internal_filename, f"audio.{CFG.output_format}")}
+        
+        # Serve audio that was synthesized before straight from disk
+        if audio_cached(internal_filename):
+            wait_for_audio(internal_filename)
+            response = send_audio(internal_filename)
+            response.headers.update(headers)
+            return response
+        
+        polly_response = polly_client.synthesize_speech(
+            Text=text,
+            VoiceId=voice_id,
+            LanguageCode=language_code,
+            OutputFormat=CFG.output_format
+        )
+        audio_stream = polly_response['AudioStream']
+        
+        def generate():
+            # Forward each chunk to the client and tee it into the cache file
+            tmp_path = temp_path_for(output_path)
+            complete = False
+            try:
+                with open(tmp_path, 'wb') as audio_file:
+                    for chunk in iter(lambda: audio_stream.read(audio_chunk_size), b''):
+                        audio_file.write(chunk)
+                        yield chunk
+                os.replace(tmp_path, output_path)
+                add_file_mapping(internal_filename, f"audio.{CFG.output_format}")
+                complete = True
+            finally:
+                audio_stream.close()
+                # The client went away or Polly failed, don't keep a partial file
+                if not complete and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        
+        return Response(generate(), mimetype=f'audio/{CFG.output_format}', headers=headers)
+    
     except Exception as e:
-        logger.error(f"Error synthesizing speech: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.error("Error streaming speech: %s\n%s", e, traceback.format_exc())
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Report the state of a background job and its result once finished"""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify({
+        'state': job['state'],
+        'status': job['status'],
+        'result': job['result']
+    })
+
+def offload_to_proxy(response, stored_filename):
+    """Replace Flask's X-Sendfile header with nginx's X-Accel-Redirect when configured"""
+    if CFG.x_accel_redirect_prefix and 'X-Sendfile' in response.headers:
+        del response.headers['X-Sendfile']
+        response.headers['X-Accel-Redirect'] = f"{CFG.x_accel_redirect_prefix.rstrip('/')}/{urllib.parse.quote(stored_filename)}"
+    return response
+
+def send_audio(stored_filename, **kwargs):
+    """Send an audio file from the output folder, leaving the body to the reverse proxy when configured"""
+    # Werkzeug's send_from_directory takes use_x_sendfile per response, unlike Flask's app-wide flag
+    response = werkzeug.utils.send_from_directory(
+        CFG.output_folder,
+        stored_filename,
+        request.environ,
+        use_x_sendfile=audio_offload,
+        response_class=app.response_class,
+        max_age=app.get_send_file_max_age,
+        **kwargs
+    )
+    return offload_to_proxy(response, stored_filename)
+
 @app.route('/api/audio/<filename>', methods=['GET'])
 def get_audio(filename):
     """Serve the generated audio file for playback (not download)"""
-    return send_from_directory(os.path.abspath(output_folder), filename)
+    wait_for_audio(filename)
+    response = send_audio(filename, conditional=True)
+    # Audio filenames are derived from their content, so a URL never changes what it points to
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 @app.route('/api/download/<path:filename>', methods=['GET'])
 def download_audio(filename):
     """Download the audio file with the correct filename"""
     try:
-        logger.info(f"Download request for file: {filename}")
+        logger.info("Download request for file: %s", filename)
         
         # Get the mapping to find the display filename
         mapping = get_file_mapping()
@@ -316,44 +970,147 @@ def download_audio(filename):
             display_filename = mapping[filename]
         else:
             # Try to find a match based on the basename (without extension)
-            for stored_name, display_name in mapping.items():
-                stored_base = stored_name.split('.')[0] if '.' in stored_name else stored_name
-                if stored_base == base_filename:
-                    stored_filename = stored_name
-                    display_filename = display_name
-                    break
+            stored_filename, display_filename = find_file_mapping(base_filename)
         
         if not stored_filename:
             # If we still don't have a match, check if the file exists with .mp3 extension
-            if os.path.exists(os.path.join(output_folder, f"{base_filename}.{output_format}")):
-                stored_filename = f"{base_filename}.{output_format}"
+            if os.path.exists(os.path.join(CFG.output_folder, f"{base_filename}.{CFG.output_format}")):
+                stored_filename = f"{base_filename}.{CFG.output_format}"
                 display_filename = stored_filename  # Use the same name if no mapping found
         
         if not stored_filename:
-            logger.error(f"No matching file found for: {filename}")
+            logger.error("No matching file found for: %s", filename)
             return jsonify({'error': 'File not found'}), 404
         
+        # A name given in the URL wins over the mapping, which only remembers the latest one
+        requested_name = secure_filename(request.args.get('name', ''))
+        if requested_name:
+            extension = os.path.splitext(stored_filename)[1]
+            display_filename = requested_name if requested_name.endswith(extension) else f"{requested_name}{extension}"
+        
         # Full path to the stored file
-        file_path = os.path.join(os.path.abspath(output_folder), stored_filename)
+        file_path = os.path.join(CFG.output_folder, stored_filename)
+        wait_for_audio(stored_filename)
         
         if not os.path.exists(file_path):
-            logger.error(f"File path doesn't exist: {file_path}")
+            logger.error("File path doesn't exist: %s", file_path)
             return jsonify({'error': 'File not found'}), 404
         
-        logger.info(f"Sending file {stored_filename} as {display_filename}")
+        logger.info("Sending file %s as %s", stored_filename, display_filename)
         
         # Send the file with the display filename for download
-        return send_file(
-            file_path,
-            mimetype=f'audio/{output_format}',
+        return send_audio(
+            stored_filename,
+            mimetype=f'audio/{CFG.output_format}',
             as_attachment=True,
             download_name=display_filename
         )
     except Exception as e:
-        logger.error(f"Error downloading file {filename}: {str(e)}")
-        logger.error(traceback.format_exc())
+        logger.error("Error downloading file %s: %s\n%s", filename, e, traceback.format_exc())
         return jsonify({'error': f"File not found or error downloading: {str(e)}"}), 404
 
+def _convert_uploaded_texts(uploads, errors, voice_id, language_code):
+    """Convert the (filename, text) pairs of an upload to speech; returns (payload, status)"""
+    results = []
+    # Mapping entries for every audio file created by this request, saved in one go
+    new_entries = {}
+    
+    for filename, text in uploads:
+        try:
+            # Check if file contains separators
+            sep_offset = find_separator(text)
+            if sep_offset != -1:
+                text_parts = split_text_by_separator(text, sep_offset)
+                
+                jobs = []
+                for part in text_parts:
+                    # Name the audio after its content so repeated requests reuse it
+                    internal_filename = audio_filename_for(part['text'], voice_id, language_code)
+                    output_path = os.path.join(CFG.output_folder, internal_filename)
+                    
+                    # Generate a clean display filename for download
+                    base_name = os.path.splitext(filename)[0]
+                    clean_name = _CLEAN_NAME_RE.sub('_', part['name'])
+                    display_filename = f"{base_name}_{clean_name}.{CFG.output_format}"
+                    
+                    jobs.append((part, internal_filename, display_filename, output_path))
+                
+                # Call Amazon Polly for all parts concurrently
+                futures = {
+                    executor.submit(_synth_one, part, voice_id, language_code, output_path): (index, part, internal_filename, display_filename)
+                    for index, (part, internal_filename, display_filename, output_path) in enumerate(jobs)
+                }
+                completed = {}
+                for future in as_completed(futures):
+                    index, part, internal_filename, display_filename = futures[future]
+                    try:
+                        future.result()
+                        new_entries[internal_filename] = display_filename
+                        
+                        completed[index] = {
+                            'partName': part['name'],
+                            'audioFilename': display_filename,
+                            'url': f'/api/audio/{internal_filename}',
+                            'downloadUrl': download_url_for(internal_filename, display_filename)
+                        }
+                    except Exception as e:
+                        logger.error("Error converting part %s of file %s to speech: %s", part['name'], filename, e)
+                        errors.append({
+                            'filename': filename,
+                            'partName': part['name'],
+                            'error': str(e)
+                        })
+                
+                # Keep results in the same order as the parts in the file
+                file_results = [completed[index] for index in sorted(completed)]
+                
+                if file_results:
+                    results.append({
+                        'originalFilename': filename,
+                        'parts': file_results,
+                        'hasParts': True
+                    })
+            else:
+                # Regular file processing (one file -> one audio)
+                # Name the audio after its content so repeated requests reuse it
+                internal_filename = audio_filename_for(text, voice_id, language_code)
+                output_path = os.path.join(CFG.output_folder, internal_filename)
+                
+                # Generate a clean display filename for download
+                base_name = os.path.splitext(filename)[0]
+                display_filename = f"{base_name}.{CFG.output_format}"
+                
+                # Call Amazon Polly to synthesize speech, unless this audio exists already
+                synthesize_to_file(text, voice_id, language_code, output_path)
+                
+                new_entries[internal_filename] = display_filename
+                
+                results.append({
+                    'originalFilename': filename,
+                    'audioFilename': display_filename,
+                    'url': f'/api/audio/{internal_filename}',
+                    'downloadUrl': download_url_for(internal_filename, display_filename),
+                    'hasParts': False
+                })
+        except Exception as e:
+            logger.error("Error converting file %s to speech: %s\n%s", filename, e, traceback.format_exc())
+            errors.append({
+                'filename': filename,
+                'error': str(e)
+            })
+    
+    # Save mapping between internal and display filenames
+    add_file_mappings(new_entries)
+    
+    if not results and errors:
+        return {'error': 'All files failed to process', 'details': errors}, 500
+    
+    return {
+        'success': True,
+        'results': results,
+        'errors': errors
+    }, 200
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     """Upload a text file and convert it to speech"""
@@ -363,114 +1120,29 @@ def upload_file():
     files = request.files.getlist('file')
     if not files or files[0].filename == '':
         return jsonify({'error': 'No selected file'}), 400
+    if len(files) > CFG.max_upload_files:
+        return jsonify({'error': f'Too many files, at most {CFG.max_upload_files} per upload'}), 400
     
-    results = []
+    uploads = []
     errors = []
     
-    voice_id = request.form.get('voiceId', voice_id_english)
+    voice_id = request.form.get('voiceId', CFG.voice_id_english)
     language_code = request.form.get('languageCode', 'en-US')
+    if not is_known_voice(voice_id):
+        return jsonify({'error': f'Unknown voice: {voice_id}'}), 400
+    keep_upload = request.form.get('keep_upload') == '1'
     
     for file in files:
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
+            # Uploads are only kept on disk when asked for with keep_upload=1
+            file_path = os.path.join(CFG.upload_folder, filename) if keep_upload else None
             
-            # Read text from the file
+            # Read text from the upload
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-                
-                # Check if file contains separators
-                if '----------' in text:
-                    text_parts = split_text_by_separator(text)
-                    file_results = []
-                    
-                    for part in text_parts:
-                        try:
-                            # Generate a unique internal filename
-                            unique_id = str(uuid.uuid4())
-                            internal_filename = f"{unique_id}.{output_format}"
-                            output_path = os.path.join(output_folder, internal_filename)
-                            
-                            # Generate a clean display filename for download
-                            base_name = os.path.splitext(filename)[0]
-                            clean_name = re.sub(r'[^a-zA-Z0-9_-]', '_', part['name'])
-                            display_filename = f"{base_name}_{clean_name}.{output_format}"
-                            
-                            # Call Amazon Polly to synthesize speech
-                            response = polly_client.synthesize_speech(
-                                Text=part['text'],
-                                VoiceId=voice_id,
-                                LanguageCode=language_code,
-                                OutputFormat=output_format
-                            )
-                            
-                            # Save the audio to a file
-                            if "AudioStream" in response:
-                                with open(output_path, 'wb') as audio_file:
-                                    audio_file.write(response['AudioStream'].read())
-                                    
-                            # Save mapping between internal and display filenames
-                            add_file_mapping(internal_filename, display_filename)
-                            
-                            file_results.append({
-                                'partName': part['name'],
-                                'audioFilename': display_filename,
-                                'url': f'/api/audio/{internal_filename}',
-                                'downloadUrl': f'/api/download/{internal_filename}'
-                            })
-                        except Exception as e:
-                            logger.error(f"Error converting part {part['name']} of file {filename} to speech: {str(e)}")
-                            errors.append({
-                                'filename': filename,
-                                'partName': part['name'],
-                                'error': str(e)
-                            })
-                    
-                    if file_results:
-                        results.append({
-                            'originalFilename': filename,
-                            'parts': file_results,
-                            'hasParts': True
-                        })
-                else:
-                    # Regular file processing (one file -> one audio)
-                    # Generate a unique internal filename
-                    unique_id = str(uuid.uuid4())
-                    internal_filename = f"{unique_id}.{output_format}"
-                    output_path = os.path.join(output_folder, internal_filename)
-                    
-                    # Generate a clean display filename for download
-                    base_name = os.path.splitext(filename)[0]
-                    display_filename = f"{base_name}.{output_format}"
-                    
-                    # Call Amazon Polly to synthesize speech
-                    response = polly_client.synthesize_speech(
-                        Text=text,
-                        VoiceId=voice_id,
-                        LanguageCode=language_code,
-                        OutputFormat=output_format
-                    )
-                    
-                    # Save the audio to a file
-                    if "AudioStream" in response:
-                        with open(output_path, 'wb') as audio_file:
-                            audio_file.write(response['AudioStream'].read())
-                    
-                    # Save mapping between internal and display filenames
-                    add_file_mapping(internal_filename, display_filename)
-                            
-                    results.append({
-                        'originalFilename': filename,
-                        'audioFilename': display_filename,
-                        'url': f'/api/audio/{internal_filename}',
-                        'downloadUrl': f'/api/download/{internal_filename}',
-                        'hasParts': False
-                    })
+                uploads.append((filename, read_upload(file, file_path)))
             except Exception as e:
-                logger.error(f"Error converting file {filename} to speech: {str(e)}")
-                logger.error(traceback.format_exc())
+                logger.error("Error reading file %s: %s\n%s", filename, e, traceback.format_exc())
                 errors.append({
                     'filename': filename,
                     'error': str(e)
@@ -481,14 +1153,12 @@ def upload_file():
                 'error': 'File type not allowed'
             })
     
-    if not results and errors:
-        return jsonify({'error': 'All files failed to process', 'details': errors}), 500
-        
-    return jsonify({
-        'success': True,
-        'results': results,
-        'errors': errors
-    })
+    # ?async=1 queues the work and returns a job id to poll instead
+    if request.args.get('async'):
+        return submit_job(_convert_uploaded_texts, uploads, errors, voice_id, language_code)
+    
+    payload, status = _convert_uploaded_texts(uploads, errors, voice_id, language_code)
+    return jsonify(payload), status
 
 @app.route('/api/upload-multiple', methods=['POST'])
 def upload_multiple_files():
@@ -499,58 +1169,51 @@ def upload_multiple_files():
     files = request.files.getlist('files[]')
     if not files or files[0].filename == '':
         return jsonify({'error': 'No selected files'}), 400
+    if len(files) > CFG.max_upload_files:
+        return jsonify({'error': f'Too many files, at most {CFG.max_upload_files} per upload'}), 400
     
     results = []
     errors = []
+    # Mapping entries for every audio file created by this request, saved in one go
+    new_entries = {}
     
-    voice_id = request.form.get('voiceId', voice_id_english)
+    voice_id = request.form.get('voiceId', CFG.voice_id_english)
     language_code = request.form.get('languageCode', 'en-US')
+    if not is_known_voice(voice_id):
+        return jsonify({'error': f'Unknown voice: {voice_id}'}), 400
+    keep_upload = request.form.get('keep_upload') == '1'
     
     for file in files:
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
-            file_path = os.path.join(upload_folder, filename)
-            file.save(file_path)
+            # Uploads are only kept on disk when asked for with keep_upload=1
+            file_path = os.path.join(CFG.upload_folder, filename) if keep_upload else None
             
-            # Read text from the file
+            # Read text from the upload
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
+                text = read_upload(file, file_path)
                 
-                # Generate a unique internal filename
-                unique_id = str(uuid.uuid4())
-                internal_filename = f"{unique_id}.{output_format}"
-                output_path = os.path.join(output_folder, internal_filename)
+                # Name the audio after its content so repeated requests reuse it
+                internal_filename = audio_filename_for(text, voice_id, language_code)
+                output_path = os.path.join(CFG.output_folder, internal_filename)
                 
                 # Generate a clean display filename for download
                 base_name = os.path.splitext(filename)[0]
-                display_filename = f"{base_name}.{output_format}"
-                
-                # Call Amazon Polly to synthesize speech
-                response = polly_client.synthesize_speech(
-                    Text=text,
-                    VoiceId=voice_id,
-                    LanguageCode=language_code,
-                    OutputFormat=output_format
-                )
+                display_filename = f"{base_name}.{CFG.output_format}"
                 
-                # Save the audio to a file
-                if "AudioStream" in response:
-                    with open(output_path, 'wb') as audio_file:
-                        audio_file.write(response['AudioStream'].read())
+                # Call Amazon Polly to synthesize speech, unless this audio exists already
+                synthesize_to_file(text, voice_id, language_code, output_path)
                 
-                # Save mapping between internal and display filenames
-                add_file_mapping(internal_filename, display_filename)
+                new_entries[internal_filename] = display_filename
                         
                 results.append({
                     'originalFilename': filename,
                     'audioFilename': display_filename,
                     'url': f'/api/audio/{internal_filename}',
-                    'downloadUrl': f'/api/download/{internal_filename}'
+                    'downloadUrl': download_url_for(internal_filename, display_filename)
                 })
             except Exception as e:
-                logger.error(f"Error converting file {filename} to speech: {str(e)}")
-                logger.error(traceback.format_exc())
+                logger.error("Error converting file %s to speech: %s\n%s", filename, e, traceback.format_exc())
                 errors.append({
                     'filename': filename,
                     'error': str(e)
@@ -561,6 +1224,9 @@ def upload_multiple_files():
                 'error': 'File type not allowed'
             })
     
+    # Save mapping between internal and display filenames
+    add_file_mappings(new_entries)
+    
     if not results and errors:
         return jsonify({'error': 'All files failed to process', 'details': errors}), 500
         
@@ -570,15 +1236,32 @@ def upload_multiple_files():
         'errors': errors
     })
 
+# Files of the React build, listed once since the build doesn't change while the app runs
+_STATIC_FILES = set()
+for root, _, files in os.walk(app.static_folder):
+    for name in files:
+        _STATIC_FILES.add(os.path.relpath(os.path.join(root, name), app.static_folder).replace(os.sep, '/'))
+
 # Serve React App
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
-    if path != "" and os.path.exists(os.path.join(app.static_folder, path)):
+    if path != "" and path in _STATIC_FILES:
         return send_from_directory(app.static_folder, path)
     else:
         return send_from_directory(app.static_folder, 'index.html')
 
+# Reject requests larger than MAX_CONTENT_LENGTH before reading their body
+@app.before_request
+def reject_large_requests():
+    # Werkzeug only enforces MAX_CONTENT_LENGTH while parsing forms; check JSON bodies too
+    if request.content_length is not None and request.content_length > app.config['MAX_CONTENT_LENGTH']:
+        abort(413)
+
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify(error=f'Request exceeds maximum size of {app.config["MAX_CONTENT_LENGTH"]} bytes'), 413
+
 # Handle 404 for missing static files (like favicon, etc.)
 @app.errorhandler(404)
 def not_found(e):
@@ -590,7 +1273,4 @@ def not_found(e):
     return jsonify(error=str(e)), 404
 
 if __name__ == '__main__':
-    host = config.get('FLASK', 'host')
-    port = config.getint('FLASK', 'port')
-    debug = config.getboolean('FLASK', 'debug')
-    app.run(host=host, port=port, debug=debug)
\ No newline at end of file
+    app.run(host=CFG.host, port=CFG.port, debug=CFG.debug)
\ No newline at end of file
@@ -0,0 +1,13 @@
+# gunicorn settings, picked up automatically when gunicorn is started from backend/:
+#   gunicorn wsgi:app
+# Pending audio writes, background jobs and the mapping of download names are
+# held in the memory of one process, so the backend runs as a single gevent
+# worker; gevent's greenlets provide the concurrency instead of extra processes.
+worker_class = 'gevent'
+workers = 1
+worker_connections = 1000
+
+def on_starting(server):
+    """Refuse to start with more than one worker, e.g. when -w is given on the command line"""
+    if server.cfg.workers != 1:
+        raise RuntimeError("The backend keeps per-process state and must run with a single worker (-w 1)")
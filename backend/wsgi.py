@@ -0,0 +1,9 @@
+# WSGI entry point for running the backend under gunicorn with a gevent worker
+# (see gunicorn.conf.py, which gunicorn loads from this directory):
+#   gunicorn wsgi:app
+# The standard library has to be patched before app.py imports boto3 so that
+# its sockets cooperate with gevent.
+from gevent import monkey
+monkey.patch_all()
+
+from app import app  # noqa: E402